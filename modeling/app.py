@@ -7,6 +7,11 @@ from flask_cors import CORS
 from werkzeug.utils import secure_filename
 import yt_dlp
 import uuid
+from numpy.lib.stride_tricks import sliding_window_view
+from cqt_engine import amplitude_to_db_batch
+from chord_decoder import viterbi_decode, path_to_segments, SELF_TRANSITION_PENALTY
+from chord_index import ChordProgressionIndex
+from precision import select_inference_policy, rebuild_with_policy
 
 app = Flask(__name__)
 CORS(app)
@@ -15,16 +20,27 @@ CORS(app)
 UPLOAD_FOLDER = 'c:/AI_PROJECT/uploads'
 MODEL_PATH = "c:/AI_PROJECT/models/chord_model.h5"
 DATA_DIR = "c:/AI_PROJECT/data/processed"
+INDEX_PATH = "c:/AI_PROJECT/data/chord_index.sqlite"
 INPUT_SHAPE = (84, 84, 1)
+DENSE_HOP_FRAMES = 8       # dense 모드 윈도우 간격 (CQT 프레임 단위, 8 x 512 / 22050 = 약 0.19초)
+DENSE_BATCH_SIZE = 256     # dense 모드 한 번에 예측할 윈도우 수
+BFLOAT16_INFERENCE = 'auto' # 'auto': bfloat16 지원 CPU에서만 사용, True/False: 강제 지정
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 # 모델 로드
 print("Loading model...")
 model = tf.keras.models.load_model(MODEL_PATH)
+# 저장된 레이어 정책(GPU 학습 시 mixed_float16)을 그대로 쓰지 않고 정밀도를 명시적으로 지정
+policy = select_inference_policy(BFLOAT16_INFERENCE)
+model = rebuild_with_policy(model, policy)
+print(f"Inference policy: {policy}")
 class_names = sorted([d for d in os.listdir(DATA_DIR) if os.path.isdir(os.path.join(DATA_DIR, d))])
 print(f"Model loaded. Classes: {len(class_names)}")
 
+# 코드 진행 검색 인덱스
+chord_index = ChordProgressionIndex(INDEX_PATH)
+
 def preprocess_audio_segment(y, sr):
     """오디오 세그먼트를 CQT 이미지로 변환"""
     target_frames = INPUT_SHAPE[1]
@@ -116,6 +132,69 @@ def analyze_audio_file(filepath):
     except Exception as e:
         return {'error': str(e)}
 
+def compute_dense_activations(y, sr, hop_frames=DENSE_HOP_FRAMES):
+    """
+    곡 전체 CQT를 한 번 계산한 뒤, 겹치는 84프레임 윈도우를 배치로 분류
+    - 반환: (윈도우 수, 클래스 수) 확률 행렬, 각 윈도우 중심 시간(초)
+    """
+    target_frames = INPUT_SHAPE[1]
+    hop_length = 512
+
+    C = librosa.cqt(y, sr=sr, n_bins=INPUT_SHAPE[0], bins_per_octave=12, hop_length=hop_length)
+    mag = np.abs(C)
+
+    n_frames = mag.shape[1]
+    if n_frames < target_frames:
+        # 짧은 곡은 윈도우 하나 (부족한 프레임은 기존처럼 dB 변환 후 0으로 채움)
+        starts = np.array([0])
+    else:
+        starts = np.arange(0, n_frames - target_frames + 1, hop_frames)
+
+    # (bins, 윈도우 수, target_frames) 뷰 -> 배치 단위로 잘라서 예측
+    windows = sliding_window_view(mag, min(target_frames, n_frames), axis=1)
+
+    probs = []
+    for i in range(0, len(starts), DENSE_BATCH_SIZE):
+        batch = windows[:, starts[i:i + DENSE_BATCH_SIZE]].transpose(1, 0, 2)
+        C_db = amplitude_to_db_batch(batch) # 윈도우별 최대값 기준 (학습 데이터와 동일)
+        if C_db.shape[2] < target_frames:
+            C_db = np.pad(C_db, ((0, 0), (0, 0), (0, target_frames - C_db.shape[2])))
+        C_db = (C_db + 80.0) / 80.0 * 255.0
+        probs.append(model.predict(C_db[..., np.newaxis], batch_size=DENSE_BATCH_SIZE, verbose=0))
+
+    centers = (starts + target_frames / 2.0) * hop_length / sr
+    return np.concatenate(probs, axis=0), centers
+
+def analyze_audio_file_dense(filepath, hop_frames=DENSE_HOP_FRAMES, penalty=SELF_TRANSITION_PENALTY):
+    """오디오 파일 dense 분석 (슬라이딩 윈도우 + Viterbi 스무딩)"""
+    try:
+        y, sr = librosa.load(filepath, sr=22050)
+        duration = librosa.get_duration(y=y, sr=sr)
+        tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
+
+        probs, centers = compute_dense_activations(y, sr, hop_frames)
+        path = viterbi_decode(probs, penalty)
+        results = path_to_segments(path, centers, class_names, duration)
+
+        return {'success': True, 'tempo': float(tempo), 'results': results}
+
+    except Exception as e:
+        return {'error': str(e)}
+
+def run_analysis(filepath, mode, name):
+    """분석 모드 선택 ('bar': 마디 단위, 'dense': 슬라이딩 윈도우) 후 검색 인덱스에 등록"""
+    if mode == 'dense':
+        result = analyze_audio_file_dense(filepath)
+    else:
+        result = analyze_audio_file(filepath)
+
+    if result.get('success'):
+        try:
+            chord_index.add(name, result['results'])
+        except Exception as e:
+            print(f"Index update failed for {name}: {e}")
+    return result
+
 @app.route('/analyze/upload', methods=['POST'])
 def upload_file():
     if 'file' not in request.files:
@@ -130,7 +209,7 @@ def upload_file():
         filepath = os.path.join(UPLOAD_FOLDER, filename)
         file.save(filepath)
         
-        result = analyze_audio_file(filepath)
+        result = run_analysis(filepath, request.form.get('mode', 'bar'), filename)
         return jsonify(result)
 
 @app.route('/analyze/youtube', methods=['POST'])
@@ -158,11 +237,25 @@ def process_youtube():
             ydl.download([url])
             
         filepath = os.path.join(UPLOAD_FOLDER, filename + ".mp3")
-        result = analyze_audio_file(filepath)
+        result = run_analysis(filepath, data.get('mode', 'bar'), url)
         return jsonify(result)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/search/progression', methods=['GET'])
+def search_progression():
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', 50, type=int)
+    if limit < 1:
+        return jsonify({'error': 'limit은 1 이상이어야 합니다.'}), 400
+
+    try:
+        results = chord_index.search(query, limit=limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({'success': True, 'query': query, 'count': len(results), 'results': results})
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
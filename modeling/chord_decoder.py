@@ -0,0 +1,61 @@
+import numpy as np
+
+# 코드 시퀀스 디코더 (Viterbi / HMM 스무딩)
+# 프레임별 코드 확률 행렬을 받아 가장 그럴듯한 코드 경로를 찾고 구간으로 묶습니다.
+
+SELF_TRANSITION_PENALTY = 8.0 # 코드가 바뀔 때마다 빼는 로그 점수 (클수록 구간이 길어짐)
+
+
+def viterbi_decode(probs, penalty=SELF_TRANSITION_PENALTY):
+    """
+    (frames, classes) 확률 행렬 -> (frames,) 클래스 인덱스 경로
+    - 전이 행렬: 같은 코드 유지 0, 다른 코드로 전이 -penalty (모든 코드 동일)
+    - 전이 구조 덕분에 프레임마다 O(클래스 수)로 계산 -> 전체 O(frames x classes)
+    """
+    log_p = np.log(np.clip(probs, 1e-10, 1.0))
+    n_frames, n_classes = log_p.shape
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.int32)
+
+    stay_idx = np.arange(n_classes, dtype=np.int32)
+    backpointers = np.empty((n_frames, n_classes), dtype=np.int32)
+    backpointers[0] = stay_idx
+    score = log_p[0].copy()
+
+    for t in range(1, n_frames):
+        # 다른 코드에서 넘어오는 최선의 점수는 (전체 최대 - penalty) 하나뿐
+        best_prev = int(np.argmax(score))
+        switch_score = score[best_prev] - penalty
+        stay = score >= switch_score
+        backpointers[t] = np.where(stay, stay_idx, best_prev)
+        score = np.maximum(score, switch_score) + log_p[t]
+
+    # 역추적
+    path = np.empty(n_frames, dtype=np.int32)
+    path[-1] = int(np.argmax(score))
+    for t in range(n_frames - 1, 0, -1):
+        path[t - 1] = backpointers[t, path[t]]
+    return path
+
+
+def path_to_segments(path, frame_times, class_names, duration):
+    """
+    클래스 경로 -> [{'start', 'end', 'chord'}] 구간 목록
+    - frame_times: 각 프레임(윈도우) 중심 시간(초)
+    - 구간 경계는 인접한 두 프레임 중심의 중간 지점
+    """
+    if len(path) == 0:
+        return []
+
+    change = np.flatnonzero(np.diff(path)) + 1
+    starts_idx = np.concatenate([[0], change])
+    ends_idx = np.concatenate([change, [len(path)]])
+
+    boundaries = (frame_times[1:] + frame_times[:-1]) / 2.0
+    boundaries = np.concatenate([[0.0], boundaries, [duration]])
+
+    return [{
+        'start': float(boundaries[s]),
+        'end': float(boundaries[e]),
+        'chord': class_names[path[s]]
+    } for s, e in zip(starts_idx, ends_idx)]
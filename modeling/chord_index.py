@@ -0,0 +1,385 @@
+import os
+import re
+import time
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+import numpy as np
+
+# 코드 진행 검색 인덱스 (Chord Progression Index)
+# 분석 결과({start, end, chord} 목록)를 클래스 인덱스 배열로 압축 저장하고,
+# 조옮김에 무관한 n-gram 역색인으로 "ii-V-I" 같은 진행을 빠르게 찾습니다.
+
+# 설정
+INDEX_PATH = "c:/AI_PROJECT/data/chord_index.sqlite"
+GRAM_SIZES = (2, 3, 4, 5) # 역색인에 넣는 n-gram 길이 (5개 이하 검색은 n-gram 하나로 바로 찾음)
+POSTING_TABLES = ('postings', 'key_postings') # 조옮김 무관 / 조 고정 역색인
+NO_CHORD = -1             # Intro 등 코드가 아닌 구간
+VERIFY_BATCH = 200        # 후보 곡을 한 번에 불러와 검증할 개수
+
+# 벤치마크 (흔한 진행에 곡이 몰린 합성 라이브러리)
+BENCHMARK_SONGS = 300_000
+BENCHMARK_LOOPS = 500     # 진행 루프 종류 (Zipf 분포로 선택)
+BENCHMARK_QUERIES = ['ii V I', 'I V vi IV', 'vi IV I V', 'A_min F_maj C_maj G_maj', 'C_maj G_maj',
+                     'I IV', 'bII V i', 'I iii vi IV V', 'I vi ii V I']
+
+NOTE_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+PITCH_CLASSES = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+ROMAN_DEGREES = {'i': 0, 'ii': 2, 'iii': 4, 'iv': 5, 'v': 7, 'vi': 9, 'vii': 11}
+CHORD_PATTERN = re.compile(r'^([A-G])([#b]?)(?:_(maj|min)|(m)?)$')
+ROMAN_PATTERN = re.compile(r'^([#b]?)(iii|ii|iv|vii|vi|v|i)$', re.IGNORECASE)
+
+
+def chord_to_index(chord):
+    """
+    코드 이름 -> 클래스 인덱스 (루트 x 2 + 성질, 장조 0 / 단조 1)
+    - 'C#_maj', 'A_min', 'Am', 'F' 형식 지원, 그 외(Intro 등)는 NO_CHORD
+    """
+    match = CHORD_PATTERN.match(chord)
+    if match is None:
+        return NO_CHORD
+    letter, accidental, quality, short_minor = match.groups()
+    root = (PITCH_CLASSES[letter] + {'#': 1, 'b': -1}.get(accidental, 0)) % 12
+    minor = quality == 'min' or short_minor == 'm'
+    return root * 2 + int(minor)
+
+
+def index_to_chord(idx):
+    """클래스 인덱스 -> 코드 이름 ('C#_maj' 형식)"""
+    if idx == NO_CHORD:
+        return 'N'
+    return f"{NOTE_NAMES[idx // 2]}_{'min' if idx % 2 else 'maj'}"
+
+
+def parse_progression(text):
+    """
+    검색어 -> (클래스 인덱스 배열, 조 고정 여부)
+    - 코드 이름('A_min F_maj C_maj G_maj', 'Am F C G'): 조 고정
+    - 로마 숫자('ii V I', 'I-V-vi-IV', 'bVII'): 조 무관 (I = C 기준으로 변환)
+    """
+    tokens = [t for t in re.split(r'[\s,\-–—]+', text.strip()) if t]
+    if not tokens:
+        raise ValueError("검색할 코드 진행이 비어 있습니다.")
+
+    chords = []
+    romans = 0
+    for token in tokens:
+        idx = chord_to_index(token)
+        if idx == NO_CHORD:
+            match = ROMAN_PATTERN.match(token)
+            if match is None:
+                raise ValueError(f"알 수 없는 코드입니다: {token}")
+            accidental, numeral = match.groups()
+            root = (ROMAN_DEGREES[numeral.lower()] + {'#': 1, 'b': -1}.get(accidental, 0)) % 12
+            idx = root * 2 + int(numeral.islower())
+            romans += 1
+        chords.append(idx)
+
+    if 0 < romans < len(tokens):
+        raise ValueError("코드 이름과 로마 숫자를 섞어 쓸 수 없습니다.")
+    return np.array(chords, dtype=np.int8), romans == 0
+
+
+def collapse_timeline(results):
+    """분석 결과 -> 연속된 같은 코드를 합친 (코드, 시작, 끝) 배열"""
+    chords, starts, ends = [], [], []
+    for seg in results:
+        idx = chord_to_index(seg['chord'])
+        if chords and chords[-1] == idx:
+            ends[-1] = seg['end']
+            continue
+        chords.append(idx)
+        starts.append(seg['start'])
+        ends.append(seg['end'])
+    return np.array(chords, dtype=np.int8), np.array(starts, dtype=np.float32), np.array(ends, dtype=np.float32)
+
+
+def _relative_tokens(chords):
+    """
+    (…, n) 클래스 인덱스 -> 조옮김 무관 토큰
+    - 첫 코드는 성질(0/1), 이후는 직전 루트와의 음정 x 2 + 성질 (0~23)
+    """
+    roots, minor = chords // 2, chords % 2
+    intervals = (np.diff(roots, axis=-1) % 12) * 2 + minor[..., 1:]
+    return np.concatenate([minor[..., :1], intervals], axis=-1)
+
+
+def _window_keys(chords, n, fixed_key=False):
+    """
+    코드 배열의 길이 n 구간별 n-gram 키와 시작 위치 (NO_CHORD가 낀 구간 제외)
+    - fixed_key=False: 조옮김 무관 키 (n, 토큰들을 24진수로)
+    - fixed_key=True: 조 고정 키 (조옮김 무관 키 x 12 + 첫 코드 루트)
+    """
+    if len(chords) < n:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    windows = np.lib.stride_tricks.sliding_window_view(chords.astype(np.int64), n)
+    valid = (windows != NO_CHORD).all(axis=1)
+    windows = windows[valid]
+
+    keys = np.full(len(windows), n, dtype=np.int64)
+    for column in _relative_tokens(windows).T:
+        keys = keys * 24 + column
+    if fixed_key:
+        keys = keys * 12 + windows[:, 0] // 2
+    return keys, np.flatnonzero(valid)
+
+
+def _gram_keys(chords, n, fixed_key=False):
+    """코드 배열에 나오는 길이 n n-gram 키 (중복 제거)"""
+    return np.unique(_window_keys(chords, n, fixed_key)[0])
+
+
+def _posting_rows(song_ids, chords_list, fixed_key):
+    """
+    여러 곡의 (n-gram 키, 곡 id) 역색인 행을 한 번에 계산 (GRAM_SIZES 모든 길이)
+    - 곡 사이에 NO_CHORD를 넣어 이어 붙이면 곡 경계를 넘는 구간은 자동으로 빠짐
+    - 반환: 중복 제거 후 (키, 곡 id) 순으로 정렬된 (행 수, 2) 배열 (B-tree에 순서대로 삽입)
+    """
+    joined = np.concatenate([part for chords in chords_list
+                             for part in (chords.astype(np.int64), [NO_CHORD])])
+    ends = np.cumsum([len(chords) + 1 for chords in chords_list])
+    song_ids = np.asarray(song_ids, dtype=np.int64)
+
+    keys, songs = [], []
+    for n in GRAM_SIZES:
+        window_keys, positions = _window_keys(joined, n, fixed_key)
+        keys.append(window_keys)
+        songs.append(song_ids[np.searchsorted(ends, positions, side='right')])
+    keys, songs = np.concatenate(keys), np.concatenate(songs)
+
+    order = np.lexsort((songs, keys))
+    rows = np.stack([keys[order], songs[order]], axis=1)
+    if len(rows) == 0:
+        return rows # 코드가 1개 이하인 곡만 있으면 n-gram 없음
+    return rows[np.concatenate([[True], (np.diff(rows, axis=0) != 0).any(axis=1)])]
+
+
+def _find_matches(chords, query, fixed_key):
+    """곡의 코드 배열에서 검색 진행이 시작되는 위치 목록"""
+    n = len(query)
+    if len(chords) < n:
+        return np.zeros(0, dtype=np.int64)
+    windows = np.lib.stride_tricks.sliding_window_view(chords.astype(np.int64), n)
+
+    hit = (windows != NO_CHORD).all(axis=1)
+    hit &= (_relative_tokens(windows) == _relative_tokens(query.astype(np.int64))).all(axis=1)
+    if fixed_key:
+        hit &= windows[:, 0] // 2 == query[0] // 2
+    return np.flatnonzero(hit)
+
+
+class ChordProgressionIndex:
+    def __init__(self, path=INDEX_PATH):
+        """
+        SQLite 기반 코드 진행 인덱스
+        - songs: 곡별 코드/시작/끝 배열 (int8, float32 BLOB)
+        - postings / key_postings: 조옮김 무관 / 조 고정 (n-gram 키, 곡 id) 역색인
+        - gram_stats: n-gram별 포함 곡 수 (가장 드문 n-gram부터 교집합을 구하는 데 사용)
+        """
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS songs (
+                                id INTEGER PRIMARY KEY,
+                                name TEXT UNIQUE NOT NULL,
+                                chords BLOB NOT NULL,
+                                starts BLOB NOT NULL,
+                                ends BLOB NOT NULL)""")
+            for table in POSTING_TABLES:
+                conn.execute(f"""CREATE TABLE IF NOT EXISTS {table} (
+                                     gram INTEGER NOT NULL,
+                                     song_id INTEGER NOT NULL,
+                                     PRIMARY KEY (gram, song_id)) WITHOUT ROWID""")
+            conn.execute("""CREATE TABLE IF NOT EXISTS gram_stats (
+                                fixed_key INTEGER NOT NULL,
+                                gram INTEGER NOT NULL,
+                                df INTEGER NOT NULL,
+                                PRIMARY KEY (fixed_key, gram)) WITHOUT ROWID""")
+
+    @contextmanager
+    def _connect(self):
+        """요청마다 새 연결 (Flask 스레드 간 공유하지 않음), 끝나면 커밋 후 닫음"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _update_postings(self, conn, song_ids, chords_list, delta):
+        """여러 곡의 n-gram을 역색인에 추가(delta=1) 또는 삭제(delta=-1)하고 gram_stats 갱신"""
+        if not song_ids:
+            return
+        for fixed_key, table in enumerate(POSTING_TABLES):
+            rows = _posting_rows(song_ids, chords_list, fixed_key).tolist()
+            if not rows:
+                continue
+            grams, counts = np.unique([g for g, _ in rows], return_counts=True)
+            stats = [(fixed_key, int(g), int(c) * delta) for g, c in zip(grams, counts)]
+            if delta > 0:
+                conn.executemany(f"INSERT INTO {table} (gram, song_id) VALUES (?, ?)", rows)
+            else:
+                # (gram, song_id) 기본 키로 지우므로 전체 역색인을 훑지 않음
+                conn.executemany(f"DELETE FROM {table} WHERE gram = ? AND song_id = ?", rows)
+            conn.executemany("""INSERT INTO gram_stats (fixed_key, gram, df) VALUES (?, ?, ?)
+                                ON CONFLICT (fixed_key, gram) DO UPDATE SET df = df + excluded.df""", stats)
+
+    def _insert(self, conn, name, results, pending):
+        """
+        한 곡 저장 (같은 이름이 있으면 교체)
+        - 새 곡의 역색인은 pending({곡 id: 코드 배열})에 모아 두었다가 _update_postings로 한 번에 추가
+        """
+        chords, starts, ends = collapse_timeline(results)
+
+        row = conn.execute("SELECT id, chords FROM songs WHERE name = ?", (name,)).fetchone()
+        if row is not None:
+            if row[0] in pending:
+                del pending[row[0]] # 같은 배치에서 먼저 넣은 곡 (아직 역색인 전)
+            else:
+                self._update_postings(conn, [row[0]], [np.frombuffer(row[1], dtype=np.int8)], -1)
+            conn.execute("DELETE FROM songs WHERE id = ?", (row[0],))
+
+        cur = conn.execute("INSERT INTO songs (name, chords, starts, ends) VALUES (?, ?, ?, ?)",
+                           (name, chords.tobytes(), starts.tobytes(), ends.tobytes()))
+        pending[cur.lastrowid] = chords
+        return cur.lastrowid
+
+    def add(self, name, results):
+        """분석 결과 한 곡 추가 (분석이 끝날 때마다 호출)"""
+        return self.add_many([(name, results)])[0]
+
+    def add_many(self, items):
+        """(이름, 분석 결과) 여러 곡을 한 트랜잭션으로 추가 (기존 라이브러리 일괄 등록용)"""
+        pending = {}
+        with self._connect() as conn:
+            song_ids = [self._insert(conn, name, results, pending) for name, results in items]
+            self._update_postings(conn, list(pending), list(pending.values()), 1)
+        return song_ids
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM songs").fetchone()[0]
+
+    def search(self, query, limit=50):
+        """
+        코드 진행 검색
+        - query: 검색어 문자열 (parse_progression 참고)
+        - 반환: [{'name', 'matches': [{'start', 'end', 'chords'}]}] (최대 limit곡)
+        """
+        if limit < 1:
+            raise ValueError("limit은 1 이상이어야 합니다.")
+        chords, fixed_key = parse_progression(query)
+        # 검색어 안의 연속 중복 코드는 저장된 타임라인처럼 하나로 합침
+        chords = chords[np.concatenate([[True], np.diff(chords) != 0])]
+        if len(chords) < min(GRAM_SIZES):
+            raise ValueError(f"코드를 {min(GRAM_SIZES)}개 이상 입력하세요.")
+
+        # 1. 검색어의 가장 긴 n-gram들 (조 고정 검색이면 조 고정 역색인 사용)
+        n = min(len(chords), max(GRAM_SIZES))
+        table = POSTING_TABLES[int(fixed_key)]
+        grams = [int(g) for g in _gram_keys(chords, n, fixed_key=fixed_key)]
+
+        results = []
+        with self._connect() as conn:
+            # 2. 포함 곡 수가 적은 n-gram부터 교집합 (하나라도 없으면 결과 없음)
+            placeholders = ",".join("?" * len(grams))
+            df = dict(conn.execute(
+                f"SELECT gram, df FROM gram_stats WHERE fixed_key = ? AND gram IN ({placeholders}) AND df > 0",
+                [int(fixed_key)] + grams).fetchall())
+            if len(df) < len(grams):
+                return results
+            grams.sort(key=df.get)
+
+            # 가장 드문 n-gram의 역색인을 곡 id 순서로 훑으면서 나머지는 기본 키로 확인
+            # (CROSS JOIN으로 순서 고정 -> limit곡을 찾으면 바로 멈출 수 있음)
+            joins = " ".join(f"CROSS JOIN {table} p{i} ON p{i}.gram = ? AND p{i}.song_id = p0.song_id"
+                             for i in range(1, len(grams)))
+            candidates = conn.execute(
+                f"SELECT p0.song_id FROM {table} p0 {joins} WHERE p0.gram = ? ORDER BY p0.song_id",
+                grams[1:] + grams[:1])
+
+            # 3. 후보 곡의 코드 배열로 실제 연속 진행(및 조) 확인
+            while True:
+                batch = [row[0] for row in candidates.fetchmany(VERIFY_BATCH)]
+                if not batch:
+                    break
+                rows = conn.execute(
+                    f"SELECT id, name, chords, starts, ends FROM songs WHERE id IN ({','.join('?' * len(batch))}) ORDER BY id",
+                    batch)
+                for _, name, chords_blob, starts_blob, ends_blob in rows:
+                    song_chords = np.frombuffer(chords_blob, dtype=np.int8)
+                    positions = _find_matches(song_chords, chords, fixed_key)
+                    if len(positions) == 0:
+                        continue
+
+                    starts = np.frombuffer(starts_blob, dtype=np.float32)
+                    ends = np.frombuffer(ends_blob, dtype=np.float32)
+                    results.append({
+                        'name': name,
+                        'matches': [{
+                            'start': float(starts[p]),
+                            'end': float(ends[p + len(chords) - 1]),
+                            'chords': [index_to_chord(int(c)) for c in song_chords[p:p + len(chords)]]
+                        } for p in positions]
+                    })
+                    if len(results) >= limit:
+                        return results
+        return results
+
+
+def make_benchmark_library(n_songs=BENCHMARK_SONGS, n_loops=BENCHMARK_LOOPS, seed=0):
+    """
+    흔한 진행(I-V-vi-IV, ii-V-I 등)에 곡이 몰린 합성 라이브러리 생성
+    - 곡마다 임의의 조, 2~3개 구간(루프 반복) + 가끔 임의 코드
+    - 반환: (이름, 분석 결과) 목록을 만드는 제너레이터
+    """
+    rng = np.random.default_rng(seed)
+    common = ['I V vi IV', 'vi IV I V', 'ii V I', 'I vi IV V', 'I IV V', 'i VI III VII', 'i iv v', 'I IV']
+    loops = [parse_progression(text)[0] for text in common]
+    while len(loops) < n_loops:
+        loops.append(rng.integers(0, 24, size=4))
+    weights = 1.0 / np.arange(1, n_loops + 1) # Zipf
+    weights /= weights.sum()
+
+    for i in range(n_songs):
+        key = rng.integers(0, 12) * 2
+        chords = []
+        for loop_id in rng.choice(n_loops, size=rng.integers(2, 4), p=weights):
+            section = np.tile(loops[loop_id], rng.integers(2, 5))
+            chords.extend(((section // 2 * 2 + key) % 24 + section % 2).tolist())
+            if rng.random() < 0.3:
+                chords.append(int(rng.integers(0, 24)))
+        results = [{'start': float(t), 'end': float(t + 1), 'chord': index_to_chord(c)} for t, c in enumerate(chords)]
+        yield f"song_{i:06d}", results
+
+
+def main():
+    # 1. 합성 라이브러리 색인
+    path = os.path.join(tempfile.mkdtemp(), "chord_index_benchmark.sqlite")
+    index = ChordProgressionIndex(path)
+    print(f"합성 라이브러리 {BENCHMARK_SONGS}곡 색인 중... ({path})")
+
+    start = time.perf_counter()
+    library = make_benchmark_library()
+    while True:
+        chunk = [item for _, item in zip(range(10_000), library)]
+        if not chunk:
+            break
+        index.add_many(chunk)
+    print(f"색인: {time.perf_counter() - start:.1f} s, {os.path.getsize(path)/1e6:.1f} MB")
+
+    # 2. 검색 속도 (limit 50 / 전체, 5회 중앙값)
+    print(f"\n{'검색어':<26}{'limit=50(ms)':>14}{'곡 수':>8}{'전체(ms)':>12}{'곡 수':>8}")
+    for query in BENCHMARK_QUERIES:
+        row = []
+        for limit in (50, BENCHMARK_SONGS):
+            times = []
+            for _ in range(5):
+                start = time.perf_counter()
+                hits = index.search(query, limit=limit)
+                times.append((time.perf_counter() - start) * 1000)
+            row += [np.median(times), len(hits)]
+        print(f"{query:<26}{row[0]:>14.1f}{row[1]:>8}{row[2]:>12.1f}{row[3]:>8}")
+
+if __name__ == "__main__":
+    main()
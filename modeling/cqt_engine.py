@@ -0,0 +1,216 @@
+import os
+import time
+import numpy as np
+import librosa
+import scipy.fft
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 배치 CQT 엔진 (Batched CQT Engine)
+# 옥타브별 CQT 필터 커널을 한 번만 만들어 두고, 길이가 같은 여러 클립을
+# (batch, samples) 행렬로 한 번에 FFT + 행렬곱으로 변환합니다.
+
+# 설정
+DATA_DIR = "c:/AI_PROJECT/data/processed"
+SAMPLE_RATE = 22050
+HOP_LENGTH = 512
+INPUT_SHAPE = (84, 84, 1)
+BINS_PER_OCTAVE = 12
+
+# librosa.cqt + amplitude_to_db 경로 대비 허용 오차 (dB 단위, 0~255 스케일에서는 x255/80)
+# 같은 커널/리샘플러를 쓰므로 차이는 float32 연산 순서에 의한 것뿐
+MEAN_TOL_DB = 0.01
+P99_TOL_DB = 0.05
+
+BENCHMARK_CLIPS = 256
+
+
+def fit_length(y, target_frames=INPUT_SHAPE[1], hop_length=HOP_LENGTH):
+    """
+    오디오 길이를 target_frames x hop_length 샘플로 고정 (패딩/크롭)
+    - 모든 클립이 같은 길이가 되어 배치로 쌓을 수 있음
+    - librosa.cqt도 끝을 0으로 패딩하므로 앞쪽 target_frames 프레임은 동일
+    """
+    required_samples = target_frames * hop_length
+    if len(y) < required_samples:
+        return np.pad(y, (0, required_samples - len(y)))
+    return y[:required_samples]
+
+
+def reference_cqt(y, sr=SAMPLE_RATE, target_frames=INPUT_SHAPE[1], hop_length=HOP_LENGTH):
+    """기존 librosa.cqt + amplitude_to_db 경로 (비교 기준, (84, 84) 반환)"""
+    C = librosa.cqt(y, sr=sr, n_bins=INPUT_SHAPE[0], bins_per_octave=BINS_PER_OCTAVE, hop_length=hop_length)
+    C_db = librosa.amplitude_to_db(np.abs(C), ref=np.max)
+
+    if C_db.shape[1] > target_frames:
+        C_db = C_db[:, :target_frames]
+    elif C_db.shape[1] < target_frames:
+        C_db = np.pad(C_db, ((0,0), (0, target_frames - C_db.shape[1])))
+
+    return (C_db + 80.0) / 80.0 * 255.0
+
+
+def amplitude_to_db_batch(mag, amin=1e-5, top_db=80.0):
+    """(batch, bins, frames) 크기를 클립별 최대값 기준 dB로 변환 (amplitude_to_db(ref=np.max)와 동일)"""
+    ref = mag.max(axis=(1, 2), keepdims=True)
+    C_db = 20.0 * np.log10(np.maximum(amin, mag)) - 20.0 * np.log10(np.maximum(amin, ref))
+    return np.maximum(C_db, C_db.max(axis=(1, 2), keepdims=True) - top_db)
+
+
+class BatchCQT:
+    def __init__(self, sr=SAMPLE_RATE, hop_length=HOP_LENGTH, n_bins=INPUT_SHAPE[0], bins_per_octave=BINS_PER_OCTAVE,
+                 target_frames=INPUT_SHAPE[1], fmin=None, chunk_size=64, top_db=80.0, amin=1e-5,
+                 sparsity=0.01, res_type='soxr_hq'):
+        """
+        옥타브별 CQT 커널 사전 계산 (librosa.cqt와 같은 멀티레이트 구조)
+        - sr, hop_length, n_bins, bins_per_octave: librosa.cqt와 같은 의미
+        - target_frames: 출력 프레임 수 (부족하면 0 dB로 패딩, 넘치면 자름)
+        - chunk_size: 한 번에 처리할 클립 수 (메모리 사용량 조절)
+        - sparsity, res_type: librosa.cqt 기본값과 동일
+        """
+        self.sr = sr
+        self.hop_length = hop_length
+        self.n_bins = n_bins
+        self.target_frames = target_frames
+        self.chunk_size = chunk_size
+        self.top_db = top_db
+        self.amin = amin
+        self.res_type = res_type
+
+        if fmin is None:
+            fmin = librosa.note_to_hz('C1') # librosa.cqt 기본값
+        freqs = librosa.cqt_frequencies(n_bins, fmin=fmin, bins_per_octave=bins_per_octave)
+
+        # scale=True: 원래 샘플링 레이트 기준 필터 길이의 제곱근으로 나눔
+        lengths, _ = librosa.filters.wavelet_lengths(freqs=freqs, sr=sr, window='hann', filter_scale=1)
+
+        # 위 옥타브부터 아래로, 옥타브마다 샘플링 레이트와 hop을 절반으로 줄이며 커널 생성
+        n_octaves = int(np.ceil(float(n_bins) / bins_per_octave))
+        n_filters = min(bins_per_octave, n_bins)
+        self.octaves = [] # (커널 (n_fft//2+1, 옥타브 bin 수), n_fft, hop, 다음 옥타브 전 다운샘플 여부)
+        my_sr, my_hop = sr, hop_length
+        for i in range(n_octaves):
+            sl = slice(-n_filters, None) if i == 0 else slice(-n_filters * (i + 1), -n_filters * i)
+
+            # 1. 시간 영역 필터 (Hann 창, L1 정규화) -> FFT 길이 재정규화
+            basis, oct_lengths = librosa.filters.wavelet(freqs=freqs[sl], sr=my_sr, filter_scale=1, norm=1,
+                                                         pad_fft=True, window='hann')
+            n_fft = basis.shape[1]
+            basis = basis * (oct_lengths[:, np.newaxis] / float(n_fft))
+
+            # 2. 주파수 영역 커널 + 희소화 (L1 질량 하위 1% 제거)
+            fft_basis = scipy.fft.fft(basis, n=n_fft, axis=1)[:, : n_fft // 2 + 1]
+            fft_basis = librosa.util.sparsify_rows(fft_basis, quantile=sparsity).toarray()
+
+            # 3. 다운샘플링 보정 및 sqrt(길이) 보정을 커널에 미리 곱해 둠
+            fft_basis *= np.sqrt(sr / my_sr) / np.sqrt(lengths[sl])[:, np.newaxis]
+
+            downsample = my_hop % 2 == 0
+            self.octaves.append((np.ascontiguousarray(fft_basis.T).astype(np.complex64), n_fft, my_hop, downsample))
+            if downsample:
+                my_hop //= 2
+                my_sr /= 2.0
+
+    def _response(self, y, kernel, n_fft, hop_length):
+        """(batch, samples) -> (batch, frames, 옥타브 bin 수) 복소 응답"""
+        pad = n_fft // 2
+        y_pad = np.pad(y, ((0, 0), (pad, pad))) # librosa.cqt 기본값: 중앙 정렬, 0 패딩
+
+        # (batch, frames, n_fft) 프레임 뷰 (복사 없음)
+        frames = sliding_window_view(y_pad, n_fft, axis=-1)[:, ::hop_length]
+        spec = scipy.fft.rfft(frames, axis=-1, workers=-1).astype(np.complex64, copy=False)
+        return spec @ kernel
+
+    def magnitude(self, y):
+        """(batch, samples) 오디오 -> (batch, n_bins, frames) CQT 크기"""
+        y = np.atleast_2d(np.asarray(y, dtype=np.float32))
+
+        out = []
+        for start in range(0, y.shape[0], self.chunk_size):
+            my_y = y[start:start + self.chunk_size]
+            responses = []
+            for kernel, n_fft, hop, downsample in self.octaves:
+                responses.append(np.abs(self._response(my_y, kernel, n_fft, hop)))
+                if downsample:
+                    my_y = librosa.resample(my_y, orig_sr=2, target_sr=1, res_type=self.res_type, scale=True)
+
+            # 아래 옥타브부터 쌓고, 가장 짧은 옥타브 프레임 수에 맞춤
+            n_frames = min(r.shape[1] for r in responses)
+            out.append(np.concatenate([r[:, :n_frames] for r in responses[::-1]], axis=2))
+
+        return np.concatenate(out, axis=0).transpose(0, 2, 1)
+
+    def to_db(self, mag):
+        """클립별 최대값 기준 amplitude_to_db(ref=np.max)"""
+        return amplitude_to_db_batch(mag, amin=self.amin, top_db=self.top_db)
+
+    def transform(self, y):
+        """(batch, samples) 오디오 -> 0~255 정규화된 (batch, n_bins, target_frames) CQT 이미지"""
+        C_db = self.to_db(self.magnitude(y))
+
+        n_frames = C_db.shape[2]
+        if n_frames > self.target_frames:
+            C_db = C_db[:, :, :self.target_frames]
+        elif n_frames < self.target_frames:
+            C_db = np.pad(C_db, ((0, 0), (0, 0), (0, self.target_frames - n_frames)))
+
+        return ((C_db + 80.0) / 80.0 * 255.0).astype(np.float32)
+
+
+def check_parity(engine, clips):
+    """librosa 경로와의 오차(dB) 계산 -> (평균, 99퍼센타일, 최대)"""
+    ours = engine.transform(clips)
+    ref = np.stack([reference_cqt(y, sr=engine.sr) for y in clips])
+    err_db = np.abs(ours - ref) * 80.0 / 255.0
+    return float(err_db.mean()), float(np.percentile(err_db, 99)), float(err_db.max())
+
+
+def load_clips(data_dir=DATA_DIR, max_clips=BENCHMARK_CLIPS):
+    """전처리된 .wav 클립을 읽어 (batch, samples) 행렬로 반환 (없으면 랜덤 신호)"""
+    paths = []
+    if os.path.exists(data_dir):
+        for cls in sorted(os.listdir(data_dir)):
+            cls_dir = os.path.join(data_dir, cls)
+            if os.path.isdir(cls_dir):
+                paths += [os.path.join(cls_dir, f) for f in sorted(os.listdir(cls_dir)) if f.endswith('.wav')]
+
+    if not paths:
+        print(f"클립이 없어 랜덤 신호로 측정합니다: {data_dir}")
+        rng = np.random.default_rng(0)
+        return rng.standard_normal((max_clips, INPUT_SHAPE[1] * HOP_LENGTH)).astype(np.float32) * 0.1
+
+    paths = paths[::max(1, len(paths) // max_clips)][:max_clips]
+    return np.stack([fit_length(librosa.load(p, sr=SAMPLE_RATE)[0]) for p in paths])
+
+
+def main():
+    # 1. 클립 로드
+    clips = load_clips()
+    print(f"클립 {clips.shape[0]}개 (길이 {clips.shape[1]} 샘플)")
+
+    # 2. 커널 사전 계산
+    start = time.perf_counter()
+    engine = BatchCQT()
+    print(f"커널 계산: {(time.perf_counter() - start)*1000:.1f} ms (옥타브별 n_fft={[n_fft for _, n_fft, _, _ in engine.octaves]})")
+
+    # 3. 정확도 비교
+    mean_err, p99_err, max_err = check_parity(engine, clips[:32])
+    passed = mean_err <= MEAN_TOL_DB and p99_err <= P99_TOL_DB
+    print(f"\n[librosa 대비 오차] 평균 {mean_err:.3f} dB / 99% {p99_err:.3f} dB / 최대 {max_err:.3f} dB")
+    print(f"허용 오차 (평균 <= {MEAN_TOL_DB} dB, 99% <= {P99_TOL_DB} dB): {'통과' if passed else '실패'}")
+
+    # 4. 속도 비교 (clips/sec)
+    start = time.perf_counter()
+    for y in clips:
+        reference_cqt(y)
+    ref_time = time.perf_counter() - start
+
+    engine.transform(clips[:engine.chunk_size]) # 워밍업
+    start = time.perf_counter()
+    engine.transform(clips)
+    batch_time = time.perf_counter() - start
+
+    print(f"\n[속도] librosa (클립별): {len(clips)/ref_time:.1f} clips/sec")
+    print(f"[속도] BatchCQT (배치):  {len(clips)/batch_time:.1f} clips/sec ({ref_time/batch_time:.1f}배)")
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ import math
 
 
 class ChordDataGenerator(tf.keras.utils.Sequence):
-    def __init__(self, data_dir, batch_size=32, input_shape=(84, 84, 1), shuffle=True, validation_split=0.0, subset='training'):
+    def __init__(self, data_dir, batch_size=32, input_shape=(84, 84, 1), shuffle=True, validation_split=0.0, subset='training', dtype=np.float32):
         """
         데이터 제너레이터 초기화
         - data_dir: 전처리된 데이터 디렉토리
@@ -16,12 +16,14 @@ class ChordDataGenerator(tf.keras.utils.Sequence):
         - input_shape: 입력 이미지 크기
         - validation_split: 검증 데이터 비율
         - subsets: 'training' 또는 'validation'
+        - dtype: 모델에 넣을 자료형 (float16으로 저장된 특징도 로드 시 변환)
         """
         self.data_dir = data_dir
         self.batch_size = batch_size
         self.input_shape = input_shape
         self.shuffle = shuffle
         self.subset = subset
+        self.dtype = dtype
         
         # 1. 클래스 목록 탐색 및 정렬
         self.classes = sorted([d for d in os.listdir(data_dir) if os.path.isdir(os.path.join(data_dir, d))])
@@ -66,9 +68,7 @@ class ChordDataGenerator(tf.keras.utils.Sequence):
         return math.ceil(len(self.file_list) / self.batch_size)
 
     def __getitem__(self, index):
-        """
         """배치 단위 데이터 생성 및 반환"""
-        """
         batch_indexes = self.indexes[index * self.batch_size : (index + 1) * self.batch_size]
         
         batch_x = []
@@ -77,8 +77,8 @@ class ChordDataGenerator(tf.keras.utils.Sequence):
         for i in batch_indexes:
             file_path, label_idx = self.file_list[i]
             
-            # 전처리된 CQT 데이터 로드 (.npy)
-            cqt_image = np.load(file_path)
+            # 전처리된 CQT 데이터 로드 (.npy, float16 저장분은 여기서 변환)
+            cqt_image = np.load(file_path).astype(self.dtype)
             
             batch_x.append(cqt_image)
             batch_y.append(label_idx)
@@ -0,0 +1,251 @@
+import os
+import time
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers
+from tensorflow.keras.models import Model
+from tensorflow.keras.optimizers import Adam
+from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping
+from data_generator import ChordDataGenerator
+from precision import rebuild_with_policy
+
+# 지식 증류 (Knowledge Distillation)
+# ResNet50 교사 모델(chord_model.h5)의 로그 확률을 한 번만 계산해 저장하고,
+# 로짓을 출력하는 작은 학생 모델을 하드 레이블 + 소프트 레이블 혼합 손실로 학습합니다.
+
+# 설정
+DATA_DIR = "c:/AI_PROJECT/data/cqt_numpy"
+TEACHER_MODEL_PATH = "c:/AI_PROJECT/models/chord_model.h5"
+STUDENT_MODEL_PATH = "c:/AI_PROJECT/models/chord_student.h5"             # 추론용 (softmax 포함)
+STUDENT_CHECKPOINT_PATH = "c:/AI_PROJECT/models/chord_student_logits.h5" # 학습용 (로짓 출력)
+SOFT_LABEL_PATH = "c:/AI_PROJECT/data/teacher_logprobs.npy"   # (N, 클래스 수) float16 로그 확률
+SOFT_LABEL_FILES_PATH = "c:/AI_PROJECT/data/teacher_files.npy" # 각 행에 대응하는 .npy 경로
+BATCH_SIZE = 32
+EPOCHS = 30
+LEARNING_RATE = 0.001
+INPUT_SHAPE = (84, 84, 1)
+ALPHA = 0.3           # 하드 레이블 손실 비중 (나머지는 소프트 레이블 손실)
+TEMPERATURE = 4.0     # 소프트 레이블 온도
+BENCHMARK_BATCH = 64  # CPU 추론 속도 측정용 배치 크기
+BENCHMARK_RUNS = 20
+
+
+def teacher_log_probs(teacher, generator):
+    """
+    교사 모델의 로그 확률 계산
+    - softmax 출력 대신 마지막 Dense의 로짓에서 바로 log_softmax를 구해 작은 확률도 보존
+    """
+    output_layer = teacher.layers[-1]
+    features = Model(inputs=teacher.inputs, outputs=output_layer.input).predict(generator)
+    kernel, bias = output_layer.get_weights()
+    logits = features.astype(np.float32) @ kernel + bias
+    return tf.nn.log_softmax(logits, axis=-1).numpy()
+
+
+def compute_teacher_probs(teacher, data_dir=DATA_DIR, batch_size=BATCH_SIZE):
+    """
+    교사 모델을 전체 데이터에 한 번만 실행하여 로그 확률 저장
+    - float16 로그 확률: 확률 자체를 float16으로 저장할 때와 달리 작은 값도 0이 되지 않음
+    - 행 순서는 ChordDataGenerator.file_list(분할 전 전체 목록)와 동일
+    - 경로 목록을 함께 저장하여 학습/검증 분할 후에도 행을 찾을 수 있음
+    """
+    generator = ChordDataGenerator(
+        data_dir=data_dir,
+        batch_size=batch_size,
+        input_shape=INPUT_SHAPE,
+        shuffle=False, # file_list 순서 그대로 예측해야 행이 정렬됨
+        validation_split=0.0
+    )
+
+    log_probs = teacher_log_probs(teacher, generator)
+    file_paths = np.array([path for path, _ in generator.file_list])
+
+    os.makedirs(os.path.dirname(SOFT_LABEL_PATH), exist_ok=True)
+    np.save(SOFT_LABEL_PATH, log_probs.astype(np.float16))
+    np.save(SOFT_LABEL_FILES_PATH, file_paths)
+    print(f"교사 소프트 레이블 저장 완료: {SOFT_LABEL_PATH} {log_probs.shape}")
+
+
+class DistillDataGenerator(ChordDataGenerator):
+    """
+    저장된 교사 로그 확률을 함께 반환하는 데이터 제너레이터
+    - 정답(y)은 [원-핫 하드 레이블 | 교사 로그 확률]을 이어붙인 형태
+    """
+
+    def __init__(self, data_dir, soft_label_path=SOFT_LABEL_PATH, soft_label_files_path=SOFT_LABEL_FILES_PATH, **kwargs):
+        super().__init__(data_dir, **kwargs)
+
+        log_probs = np.load(soft_label_path, mmap_mode='r')
+        file_paths = np.load(soft_label_files_path)
+        row_of = {path: i for i, path in enumerate(file_paths)}
+
+        missing = [path for path, _ in self.file_list if path not in row_of]
+        if missing:
+            raise ValueError(f"교사 소프트 레이블에 없는 파일이 {len(missing)}개 있습니다. compute_teacher_probs를 다시 실행하세요.")
+
+        # file_list와 같은 순서로 정렬하여 메모리에 올림 (float16 유지)
+        rows = np.array([row_of[path] for path, _ in self.file_list], dtype=np.int64)
+        self.soft_labels = np.asarray(log_probs[rows])
+
+    def __getitem__(self, index):
+        """배치 단위 데이터 + 소프트 레이블 반환"""
+        batch_x, batch_hard = super().__getitem__(index)
+        batch_indexes = self.indexes[index * self.batch_size : (index + 1) * self.batch_size]
+        batch_soft = self.soft_labels[batch_indexes].astype(np.float32)
+        return batch_x, np.concatenate([batch_hard, batch_soft], axis=1)
+
+
+def make_distillation_loss(num_classes, alpha=ALPHA, temperature=TEMPERATURE):
+    """
+    하드 레이블 교차 엔트로피 + 온도 적용 KL 발산 혼합 손실
+    - y_pred는 학생 로짓, 소프트 레이블은 교사 로그 확률 (둘 다 log_softmax로 계산해 클리핑 없음)
+    """
+    def distillation_loss(y_true, y_pred):
+        y_true = tf.cast(y_true, y_pred.dtype)
+        hard = y_true[:, :num_classes]
+        teacher_log_p = y_true[:, num_classes:]
+
+        hard_loss = tf.keras.losses.categorical_crossentropy(hard, y_pred, from_logits=True)
+
+        # KL(softmax(교사 / T) || softmax(학생 로짓 / T))
+        teacher_log_soft = tf.nn.log_softmax(teacher_log_p / temperature, axis=-1)
+        student_log_soft = tf.nn.log_softmax(y_pred / temperature, axis=-1)
+        soft_loss = tf.reduce_sum(tf.exp(teacher_log_soft) * (teacher_log_soft - student_log_soft), axis=-1)
+
+        # T^2를 곱해 온도에 따른 그래디언트 크기 보정
+        return alpha * hard_loss + (1 - alpha) * soft_loss * (temperature ** 2)
+    return distillation_loss
+
+
+def make_hard_accuracy(num_classes):
+    """이어붙인 정답 중 하드 레이블 부분만으로 정확도 계산"""
+    def hard_accuracy(y_true, y_pred):
+        hard = y_true[:, :num_classes]
+        return tf.cast(tf.equal(tf.argmax(hard, axis=-1), tf.argmax(y_pred, axis=-1)), tf.float32)
+    return hard_accuracy
+
+
+def build_student_model(num_classes):
+    """작은 CNN 학생 모델 정의 (로짓 출력, 추론 시에는 with_softmax로 감쌈)"""
+    input_tensor = layers.Input(shape=INPUT_SHAPE)
+    x = layers.Rescaling(1.0 / 255.0)(input_tensor)
+
+    # 합성곱 블록 (Conv-BN-ReLU-Pool)
+    for filters in (16, 32, 64):
+        x = layers.Conv2D(filters, (3, 3), padding='same', use_bias=False)(x)
+        x = layers.BatchNormalization()(x)
+        x = layers.ReLU()(x)
+        x = layers.MaxPooling2D((2, 2))(x)
+
+    x = layers.Conv2D(128, (3, 3), padding='same', activation='relu')(x)
+    x = layers.GlobalAveragePooling2D()(x)
+    x = layers.Dropout(0.3)(x)
+    logits = layers.Dense(num_classes)(x)
+
+    return Model(inputs=input_tensor, outputs=logits)
+
+
+def with_softmax(logits_model):
+    """로짓 모델 뒤에 softmax를 붙인 추론용 모델"""
+    probs = layers.Softmax()(logits_model.output)
+    return Model(inputs=logits_model.inputs, outputs=probs)
+
+
+def measure_cpu_latency(model, batch_size=BENCHMARK_BATCH, runs=BENCHMARK_RUNS):
+    """CPU에서 배치 1회 추론 평균 시간(초) 측정"""
+    x = np.random.uniform(0, 255, size=(batch_size,) + INPUT_SHAPE).astype(np.float32)
+    with tf.device('/CPU:0'):
+        model(x, training=False) # 워밍업
+        start = time.perf_counter()
+        for _ in range(runs):
+            model(x, training=False)
+        elapsed = time.perf_counter() - start
+    return elapsed / runs
+
+
+def evaluate_accuracy(model, generator):
+    """검증 데이터 정확도 계산"""
+    predictions = model.predict(generator, verbose=0)
+    y_pred = np.argmax(predictions, axis=1)
+    y_true = np.array([item[1] for item in generator.file_list])
+    return float(np.mean(y_pred == y_true))
+
+
+def main():
+    # 1. 교사 모델 로드
+    if not os.path.exists(TEACHER_MODEL_PATH):
+        print(f"교사 모델 파일이 없습니다: {TEACHER_MODEL_PATH}")
+        return
+
+    print("교사 모델을 불러오는 중...")
+    teacher = tf.keras.models.load_model(TEACHER_MODEL_PATH)
+    teacher = rebuild_with_policy(teacher, 'float32') # GPU 학습 모델(mixed_float16)도 float32로 계산
+
+    # 2. 교사 소프트 레이블 계산 (이미 있으면 재사용)
+    if not (os.path.exists(SOFT_LABEL_PATH) and os.path.exists(SOFT_LABEL_FILES_PATH)):
+        print("\n교사 소프트 레이블 계산 중...")
+        compute_teacher_probs(teacher)
+    else:
+        print(f"\n저장된 교사 소프트 레이블 사용: {SOFT_LABEL_PATH}")
+
+    # 3. 데이터 제너레이터 설정 (train.py와 같은 분할)
+    train_generator = DistillDataGenerator(
+        DATA_DIR,
+        batch_size=BATCH_SIZE,
+        input_shape=INPUT_SHAPE,
+        shuffle=True,
+        validation_split=0.2,
+        subset='training'
+    )
+    validation_generator = DistillDataGenerator(
+        DATA_DIR,
+        batch_size=BATCH_SIZE,
+        input_shape=INPUT_SHAPE,
+        shuffle=False,
+        validation_split=0.2,
+        subset='validation'
+    )
+    num_classes = train_generator.num_classes
+
+    # 4. 학생 모델 만들기 및 컴파일
+    student = build_student_model(num_classes)
+    student.compile(optimizer=Adam(learning_rate=LEARNING_RATE),
+                    loss=make_distillation_loss(num_classes),
+                    metrics=[make_hard_accuracy(num_classes)])
+    student.summary()
+
+    # 5. 학습
+    os.makedirs(os.path.dirname(STUDENT_MODEL_PATH), exist_ok=True)
+    callbacks = [
+        ModelCheckpoint(STUDENT_CHECKPOINT_PATH, save_best_only=True, monitor='val_loss', mode='min'),
+        EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True)
+    ]
+
+    print("\n 학생 모델 학습 시작...")
+    student.fit(
+        train_generator,
+        epochs=EPOCHS,
+        callbacks=callbacks,
+        validation_data=validation_generator
+    )
+
+    # 추론용 모델은 softmax를 붙여 교사 모델과 같은 확률 출력으로 저장
+    student_inference = with_softmax(student)
+    student_inference.save(STUDENT_MODEL_PATH)
+    print(f"\n 학습 완료! 학생 모델 저장됨: {STUDENT_MODEL_PATH}")
+
+    # 6. 정확도 및 CPU 추론 속도 비교 (서빙과 같은 softmax 포함 모델 기준)
+    print("\n교사/학생 모델 비교 중...")
+    teacher_acc = evaluate_accuracy(teacher, validation_generator)
+    student_acc = evaluate_accuracy(student_inference, validation_generator)
+    teacher_time = measure_cpu_latency(teacher)
+    student_time = measure_cpu_latency(student_inference)
+
+    print(f"\n[지식 증류 결과] (CPU, 배치 {BENCHMARK_BATCH})")
+    print(f"{'모델':<10}{'정확도':>10}{'배치 시간(ms)':>16}{'파라미터 수':>14}")
+    print(f"{'교사':<10}{teacher_acc*100:>9.2f}%{teacher_time*1000:>16.1f}{teacher.count_params():>14,}")
+    print(f"{'학생':<10}{student_acc*100:>9.2f}%{student_time*1000:>16.1f}{student.count_params():>14,}")
+    print(f"정확도 차이: {(student_acc - teacher_acc)*100:+.2f}%p, 추론 속도 향상: {teacher_time / student_time:.1f}배")
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,14 @@ from sklearn.metrics import classification_report, confusion_matrix
 import seaborn as sns
 import matplotlib.pyplot as plt
 from data_generator import ChordDataGenerator
+from precision import rebuild_with_policy, measure_throughput, activation_bytes
 
 # 설정
 DATA_DIR = "c:/AI_PROJECT/data/cqt_numpy"
 MODEL_PATH = "c:/AI_PROJECT/models/chord_model.h5"
 BATCH_SIZE = 32
 INPUT_SHAPE = (84, 84, 1)
+COMPARE_PRECISION = True # float32 대비 bfloat16 메모리/처리량/정확도 비교
 
 def main():
     # 1. 모델 파일 로드
@@ -77,5 +79,43 @@ def main():
     except Exception as e:
         print(f"\n이미지 저장 중 오류 발생: {e}")
 
+    # 7. 정밀도 비교 (float32 vs bfloat16)
+    if COMPARE_PRECISION:
+        compare_precision(model, validation_generator, y_true)
+
+def compare_precision(model, generator, y_true):
+    """float32 기준 모델과 bfloat16 추론 모델의 메모리, 처리량, 정확도 비교"""
+    # 저장된 정책(mixed_float16 등)과 무관하게 두 모델 모두 명시적으로 다시 생성
+    print("\n[정밀도 비교] float32 / bfloat16 모델 생성 중...")
+    fp32_model = rebuild_with_policy(model, 'float32')
+    bf16_model = rebuild_with_policy(model, 'mixed_bfloat16')
+    y_true = np.array(y_true)
+
+    # 정확도
+    fp32_pred = np.argmax(fp32_model.predict(generator), axis=1)
+    bf16_pred = np.argmax(bf16_model.predict(generator), axis=1)
+    fp32_acc = np.mean(fp32_pred == y_true)
+    bf16_acc = np.mean(bf16_pred == y_true)
+    agreement = np.mean(bf16_pred == fp32_pred)
+
+    # 처리량 (CPU)
+    fp32_speed = measure_throughput(fp32_model, INPUT_SHAPE)
+    bf16_speed = measure_throughput(bf16_model, INPUT_SHAPE)
+
+    # 메모리: 배치 32 기준 레이어 출력(활성값) 크기 (가중치는 두 모델 모두 float32)
+    fp32_act = activation_bytes(fp32_model, batch_size=32)
+    bf16_act = activation_bytes(bf16_model, batch_size=32)
+
+    # 메모리: 특징 파일 (float16 저장 vs float32 저장 시 예상 크기)
+    n_files = len(generator.file_list)
+    stored_bytes = sum(os.path.getsize(path) for path, _ in generator.file_list)
+    fp32_bytes = n_files * int(np.prod(INPUT_SHAPE)) * 4
+
+    print(f"\n{'':<14}{'float32':>14}{'bfloat16':>14}")
+    print(f"{'정확도':<14}{fp32_acc*100:>13.2f}%{bf16_acc*100:>13.2f}%  (차이 {(bf16_acc - fp32_acc)*100:+.2f}%p, 예측 일치율 {agreement*100:.2f}%)")
+    print(f"{'처리량(img/s)':<14}{fp32_speed:>14.1f}{bf16_speed:>14.1f}  ({bf16_speed / fp32_speed:.2f}배)")
+    print(f"{'활성값(MB)':<14}{fp32_act/1e6:>14.1f}{bf16_act/1e6:>14.1f}  (배치 32, 전체 레이어 출력 합)")
+    print(f"{'특징 파일(MB)':<14}{fp32_bytes/1e6:>14.1f}{stored_bytes/1e6:>14.1f}  (검증 데이터 {n_files}개, 현재 저장 기준)")
+
 if __name__ == "__main__":
     main()
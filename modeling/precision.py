@@ -0,0 +1,91 @@
+import time
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import mixed_precision
+
+# 정밀도 설정 (Reduced Precision)
+# 학습용 mixed precision 정책 선택과 bfloat16 추론 모델 생성을 담당합니다.
+
+
+def cpu_supports_bfloat16():
+    """CPU가 bfloat16 연산 명령어(AVX512_BF16 / AMX_BF16)를 지원하는지 확인"""
+    try:
+        with open('/proc/cpuinfo') as f:
+            flags = f.read()
+    except OSError:
+        # /proc/cpuinfo가 없는 환경(Windows 등)은 판단 불가 -> 사용 안 함
+        return False
+    return 'avx512_bf16' in flags or 'amx_bf16' in flags
+
+
+def select_training_policy():
+    """
+    학습에 쓸 정밀도 정책 선택
+    - GPU: 'mixed_float16' (손실 스케일링은 compile 시 자동 적용)
+    - bfloat16 지원 CPU: 'mixed_bfloat16'
+    - 그 외: 'float32' (지원 안 되는 CPU에서는 오히려 느려짐)
+    """
+    if tf.config.list_physical_devices('GPU'):
+        return 'mixed_float16'
+    if cpu_supports_bfloat16():
+        return 'mixed_bfloat16'
+    return 'float32'
+
+
+def select_inference_policy(setting='auto'):
+    """
+    추론에 쓸 정밀도 정책 선택
+    - setting: 'auto'(bfloat16 지원 CPU에서만 사용) / True / False
+    """
+    if setting is True or (setting == 'auto' and cpu_supports_bfloat16()):
+        return 'mixed_bfloat16'
+    return 'float32'
+
+
+def rebuild_with_policy(model, policy):
+    """
+    저장된 모델과 같은 구조를 지정한 정책으로 다시 만들고 가중치 복사
+    - h5에 저장된 레이어 정책(예: GPU 학습의 mixed_float16)과 무관하게 연산 정밀도를 정함
+    - mixed 정책에서도 가중치는 float32로 유지, 출력층 softmax는 항상 float32
+    """
+    from train import build_model
+
+    previous = mixed_precision.global_policy()
+    mixed_precision.set_global_policy(policy)
+    try:
+        new_model = build_model(model.output_shape[-1], weights=None)
+    finally:
+        mixed_precision.set_global_policy(previous)
+
+    new_model.set_weights(model.get_weights())
+    return new_model
+
+
+def activation_bytes(model, batch_size=1):
+    """
+    모든 레이어 출력 텐서 크기 합 (연산 자료형 기준, 배치 batch_size)
+    - 중첩 모델(ResNet50 등)은 내부 레이어까지 합산
+    """
+    total = 0
+    for layer in model.layers:
+        if isinstance(layer, tf.keras.Model):
+            total += activation_bytes(layer, batch_size)
+            continue
+        if isinstance(layer, tf.keras.layers.InputLayer):
+            continue
+        outputs = layer.output if isinstance(layer.output, (list, tuple)) else [layer.output]
+        for t in outputs:
+            total += int(np.prod(t.shape[1:])) * batch_size * tf.as_dtype(t.dtype).size
+    return total
+
+
+def measure_throughput(model, input_shape, batch_size=32, runs=10):
+    """CPU 추론 처리량 (images/sec)"""
+    x = np.random.uniform(0, 255, size=(batch_size,) + tuple(input_shape)).astype(np.float32)
+    with tf.device('/CPU:0'):
+        model(x, training=False) # 워밍업
+        start = time.perf_counter()
+        for _ in range(runs):
+            model(x, training=False)
+        elapsed = time.perf_counter() - start
+    return batch_size * runs / elapsed
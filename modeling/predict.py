@@ -3,11 +3,13 @@ import numpy as np
 import librosa
 import tensorflow as tf
 import random
+from precision import select_inference_policy, rebuild_with_policy
 
 # 설정
 MODEL_PATH = "c:/AI_PROJECT/models/chord_model.h5"
 DATA_DIR = "c:/AI_PROJECT/data/processed"
 INPUT_SHAPE = (84, 84, 1)
+BFLOAT16_INFERENCE = 'auto' # 'auto': bfloat16 지원 CPU에서만 사용, True/False: 강제 지정
 
 def get_class_names():
     """디렉토리에서 클래스 목록 로드"""
@@ -22,12 +24,12 @@ def preprocess_audio(file_path):
         # 2. 길이 맞추기
         target_frames = INPUT_SHAPE[1]
         hop_length = 512
-        required_samples = (target_frames - 1) * hop_length
+        required_samples = target_frames * hop_length # 모든 클립을 같은 길이로 고정 (cqt_engine.fit_length와 동일)
         
         if len(y) < required_samples:
             y = np.pad(y, (0, required_samples - len(y)))
         else:
-            y = y[:required_samples + hop_length]
+            y = y[:required_samples]
 
         # 3. CQT 변환
         C = librosa.cqt(y, sr=sr, 
@@ -65,6 +67,10 @@ def main():
     # 2. 모델 로드
     print("모델 로딩 중...")
     model = tf.keras.models.load_model(MODEL_PATH)
+    # 저장된 레이어 정책(GPU 학습 시 mixed_float16)을 그대로 쓰지 않고 정밀도를 명시적으로 지정
+    policy = select_inference_policy(BFLOAT16_INFERENCE)
+    model = rebuild_with_policy(model, policy)
+    print(f"추론 정밀도 정책: {policy}")
     print("모델 로드 완료")
     
     # 3. 테스트 파일 랜덤 선택
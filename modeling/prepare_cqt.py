@@ -3,11 +3,15 @@ import numpy as np
 import librosa
 import concurrent.futures
 from tqdm import tqdm
+from cqt_engine import BatchCQT, fit_length
 
 # 설정
 DATA_DIR = "c:/AI_PROJECT/data/processed"
 OUTPUT_DIR = "c:/AI_PROJECT/data/cqt_numpy"
 INPUT_SHAPE = (84, 84, 1)
+USE_BATCH_CQT = False # True면 BatchCQT로 여러 클립을 한 번에 변환 (librosa 경로와 미세한 오차 있음)
+CQT_BATCH_SIZE = 64
+FEATURE_DTYPE = np.float16 # 값 범위가 0~255라 float16으로 충분 (용량 절반, 로드 시 float32로 변환)
 
 def process_file(args):
     file_path, save_path = args
@@ -19,12 +23,12 @@ def process_file(args):
         # 2. 길이 조정 (패딩/크롭)
         target_frames = INPUT_SHAPE[1]
         hop_length = 512
-        required_samples = (target_frames - 1) * hop_length
+        required_samples = target_frames * hop_length # 모든 클립을 같은 길이로 고정 (cqt_engine.fit_length와 동일)
         
         if len(y) < required_samples:
             y = np.pad(y, (0, required_samples - len(y)))
         else:
-            y = y[:required_samples + hop_length]
+            y = y[:required_samples]
 
         # 3. CQT 변환 수행
         C = librosa.cqt(y, sr=sr, 
@@ -48,13 +52,34 @@ def process_file(args):
         C_db = C_db[..., np.newaxis]
         
         # 8. .npy 파일 저장
-        np.save(save_path, C_db.astype(np.float32))
+        np.save(save_path, C_db.astype(FEATURE_DTYPE))
         return True
         
     except Exception as e:
         print(f"Error processing {file_path}: {e}")
         return False
 
+def load_clip(file_path):
+    """오디오 로드 + 길이 조정 (BatchCQT 입력용)"""
+    try:
+        y, _ = librosa.load(file_path, sr=22050)
+        return fit_length(y, INPUT_SHAPE[1], 512)
+    except Exception as e:
+        print(f"Error processing {file_path}: {e}")
+        return None
+
+def process_batch(tasks, engine, executor):
+    """여러 파일을 한 번에 CQT 변환 후 저장"""
+    clips = list(executor.map(load_clip, [src for src, _ in tasks]))
+    valid = [(clip, dst) for clip, (_, dst) in zip(clips, tasks) if clip is not None]
+    if not valid:
+        return 0
+
+    C_db = engine.transform(np.stack([clip for clip, _ in valid]))
+    for image, (_, dst) in zip(C_db, valid):
+        np.save(dst, image[..., np.newaxis].astype(FEATURE_DTYPE))
+    return len(valid)
+
 def main():
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
@@ -85,7 +110,13 @@ def main():
     
     # 병렬 처리 수행
     with concurrent.futures.ProcessPoolExecutor() as executor:
-        results = list(tqdm(executor.map(process_file, tasks), total=len(tasks), desc="CQT 변환 중"))
+        if USE_BATCH_CQT:
+            # 오디오 로드는 병렬, CQT는 배치 단위로 한 번에 수행
+            engine = BatchCQT(sr=22050, hop_length=512, n_bins=INPUT_SHAPE[0], target_frames=INPUT_SHAPE[1])
+            for i in tqdm(range(0, len(tasks), CQT_BATCH_SIZE), desc="CQT 배치 변환 중"):
+                process_batch(tasks[i:i + CQT_BATCH_SIZE], engine, executor)
+        else:
+            results = list(tqdm(executor.map(process_file, tasks), total=len(tasks), desc="CQT 변환 중"))
         
     print("완료!")
 
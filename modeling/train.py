@@ -5,7 +5,9 @@ from tensorflow.keras.models import Model
 from tensorflow.keras.layers import Dense, GlobalAveragePooling2D, Dropout, Input
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping
+from tensorflow.keras import mixed_precision
 from data_generator import ChordDataGenerator
+from precision import select_training_policy
 
 
 # 설정
@@ -16,15 +18,16 @@ EPOCHS = 20           # 학습 에포크 수
 LEARNING_RATE = 0.0001 # 학습률 (미세 조정)
 INPUT_SHAPE = (84, 84, 1) # 입력 이미지 형상 (H, W, C)
 NUM_CLASSES = 24      # 분류 클래스 수
+MIXED_PRECISION = True # GPU는 float16, bfloat16 지원 CPU는 bfloat16으로 연산
 
-def build_model(num_classes):
-    """ResNet50 기반 코드 분류 모델 정의"""
+def build_model(num_classes, weights='imagenet'):
+    """ResNet50 기반 코드 분류 모델 정의 (weights=None이면 가중치 다운로드 없이 구조만 생성)"""
     # 1. 입력층 (1채널 -> 3채널 변환)
     input_tensor = Input(shape=INPUT_SHAPE)
     x = tf.keras.layers.Conv2D(3, (3, 3), padding='same')(input_tensor)
     
     # 2. ResNet50 모델 로드 (ImageNet 가중치 사용)
-    base_model = ResNet50(weights='imagenet', include_top=False, input_shape=(84, 84, 3))
+    base_model = ResNet50(weights=weights, include_top=False, input_shape=(84, 84, 3))
     x = base_model(x)
     
     # 3. 미세 조정 (Fine-Tuning) 활성화
@@ -35,8 +38,8 @@ def build_model(num_classes):
     x = Dense(1024, activation='relu')(x)
     x = Dropout(0.5)(x)
     
-    # 5. 출력층
-    predictions = Dense(num_classes, activation='softmax')(x)
+    # 5. 출력층 (mixed precision에서도 softmax는 float32로 계산)
+    predictions = Dense(num_classes, activation='softmax', dtype='float32')(x)
     
     # 모델 생성
     model = Model(inputs=input_tensor, outputs=predictions)
@@ -46,6 +49,12 @@ def main():
     # 1. 모델 저장할 폴더 만들기
     os.makedirs(os.path.dirname(MODEL_SAVE_PATH), exist_ok=True)
     
+    # 정밀도 정책 설정 (모델 생성 전에 지정해야 적용됨)
+    if MIXED_PRECISION:
+        policy = select_training_policy()
+        mixed_precision.set_global_policy(policy)
+        print(f"정밀도 정책: {policy}")
+    
     # 2. 데이터 제너레이터 설정
     # 전체 데이터의 20%는 검증용(Validation)으
     # 학습용 (80%)